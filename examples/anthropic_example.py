@@ -13,18 +13,70 @@ Setup:
 """
 
 import os
-from anthropic import Anthropic
+import asyncio
+import httpx
+from anthropic import AsyncAnthropic, APIConnectionError, APITimeoutError
 
-def main():
-    # Initialize the Anthropic client
-    # The client will automatically use the ANTHROPIC_API_KEY environment variable
-    client = Anthropic(
-        api_key=os.environ.get("ANTHROPIC_API_KEY")
+from prompt_cache import with_cache_breakpoint
+from stream_writer import CoalescingStdout
+
+# Timeouts in seconds. A non-streaming response only arrives once the whole
+# generation is done, so its read timeout grows with max_tokens; the base
+# value alone bounds the wait for the first streamed token.
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT_BASE = 10.0
+READ_TIMEOUT_PER_TOKEN = 0.05
+
+# Number of attempts per request
+MAX_ATTEMPTS = 3
+
+# Beta header enabling prompt caching
+PROMPT_CACHING_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+
+def create_client():
+    """Create an async Anthropic client with connect and first-token timeouts"""
+    # The client will automatically use the ANTHROPIC_API_KEY environment variable.
+    # SDK retries are disabled since create_message() does its own.
+    return AsyncAnthropic(
+        api_key=os.environ.get("ANTHROPIC_API_KEY"),
+        timeout=httpx.Timeout(READ_TIMEOUT_BASE, connect=CONNECT_TIMEOUT),
+        max_retries=0
     )
-    
+
+
+def request_timeout(max_tokens: int) -> httpx.Timeout:
+    """Timeout for a non-streaming request generating up to max_tokens"""
+    return httpx.Timeout(
+        READ_TIMEOUT_BASE + max_tokens * READ_TIMEOUT_PER_TOKEN,
+        connect=CONNECT_TIMEOUT
+    )
+
+
+def is_retryable(error: APIConnectionError) -> bool:
+    """Retry failed connections, but not a request that timed out mid-generation"""
+    if isinstance(error, APITimeoutError):
+        return isinstance(error.__cause__, httpx.ConnectTimeout)
+    return True
+
+
+async def create_message(client, **kwargs):
+    """Create a message, retrying when the connection to the API fails"""
+    kwargs.setdefault("timeout", request_timeout(kwargs["max_tokens"]))
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return await client.messages.create(**kwargs)
+        except APIConnectionError as e:
+            # APITimeoutError is a subclass of APIConnectionError
+            if attempt == MAX_ATTEMPTS - 1 or not is_retryable(e):
+                raise
+
+
+async def main(client):
     # Create a message
     print("Sending request to Claude...")
-    message = client.messages.create(
+    message = await create_message(
+        client,
         model="claude-sonnet-4-5-20250929",  # Latest Claude Sonnet 4.5
         max_tokens=1024,
         messages=[
@@ -36,7 +88,8 @@ def main():
     )
     
     # Print the response
-    print("\nClaude's response:")
+    print("\n=== Basic Example ===")
+    print("Claude's response:")
     print(message.content[0].text)
     
     # Print usage information
@@ -45,13 +98,13 @@ def main():
     print(f"Output tokens: {message.usage.output_tokens}")
     
 
-def streaming_example():
+async def streaming_example(client):
     """Example of streaming responses for real-time output"""
-    client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-    
     print("Streaming response from Claude...\n")
     
-    with client.messages.stream(
+    # A stream cannot be replayed by create_message(), so let the SDK retry
+    # establishing it instead
+    async with client.with_options(max_retries=MAX_ATTEMPTS - 1).messages.stream(
         model="claude-sonnet-4-5-20250929",
         max_tokens=1024,
         messages=[
@@ -61,16 +114,15 @@ def streaming_example():
             }
         ]
     ) as stream:
-        for text in stream.text_stream:
-            print(text, end="", flush=True)
-    
-    print("\n")
+        writer = CoalescingStdout()
+        async for text in stream.text_stream:
+            writer.feed(text)
+        writer.feed("\n\n")
+        writer.close()
 
 
-def multi_turn_conversation():
+async def multi_turn_conversation(client):
     """Example of a multi-turn conversation"""
-    client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-    
     messages = [
         {
             "role": "user",
@@ -79,19 +131,19 @@ def multi_turn_conversation():
     ]
     
     # First turn
-    response = client.messages.create(
+    response = await create_message(
+        client,
         model="claude-sonnet-4-5-20250929",
         max_tokens=1024,
-        messages=messages
+        messages=with_cache_breakpoint(messages),
+        extra_headers=PROMPT_CACHING_HEADERS
     )
-    
-    print("User: What is the capital of France?")
-    print(f"Claude: {response.content[0].text}\n")
+    first_answer = response.content[0].text
     
     # Add assistant's response to conversation
     messages.append({
         "role": "assistant",
-        "content": response.content[0].text
+        "content": first_answer
     })
     
     # Second turn
@@ -100,22 +152,45 @@ def multi_turn_conversation():
         "content": "What is its population?"
     })
     
-    response = client.messages.create(
+    response = await create_message(
+        client,
         model="claude-sonnet-4-5-20250929",
         max_tokens=1024,
-        messages=messages
+        messages=with_cache_breakpoint(messages),
+        extra_headers=PROMPT_CACHING_HEADERS
     )
     
+    # Print the whole transcript at once so it does not interleave with
+    # examples running concurrently
+    print("\n=== Multi-turn Conversation ===")
+    print("User: What is the capital of France?")
+    print(f"Claude: {first_answer}\n")
     print("User: What is its population?")
     print(f"Claude: {response.content[0].text}")
 
 
+async def run_examples():
+    """Run all examples, overlapping the independent request/response ones"""
+    # One client is shared so every example reuses its connection pool, and
+    # closed when the examples are done
+    async with create_client() as client:
+        # Streaming writes tokens as they arrive, so it runs on its own
+        print("=== Streaming Example ===")
+        await streaming_example(client)
+        
+        # The remaining examples do not depend on each other, so their network
+        # round-trips are issued concurrently
+        await asyncio.gather(
+            main(client),
+            multi_turn_conversation(client)
+        )
+
+
 if __name__ == "__main__":
-    print("=== Basic Example ===")
-    main()
-    
-    print("\n\n=== Streaming Example ===")
-    streaming_example()
-    
-    print("\n\n=== Multi-turn Conversation ===")
-    multi_turn_conversation()
+    try:
+        asyncio.run(run_examples())
+    except Exception as e:
+        print(f"Error: {e}")
+        print("\nMake sure you have:")
+        print("1. Set ANTHROPIC_API_KEY environment variable")
+        print("2. Installed the anthropic package: pip install anthropic")
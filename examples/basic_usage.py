@@ -6,9 +6,83 @@ Demonstrates simple usage of the LLM abstraction system
 email: ajsinha@gmail.com
 """
 
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
 from llmutils import initialize_system
 
 
+# Exact-match cache of deterministic (temperature 0) responses
+_response_cache: Dict[str, Any] = {}
+
+
+def cache_key(provider: str, model: str, messages: List[Dict[str, str]],
+              params: Dict[str, Any]) -> str:
+    """
+    Build a cache key for a request.
+    
+    Args:
+        provider: Provider name
+        model: Model name
+        messages: Chat messages sent to the model
+        params: Generation parameters sent with the request
+        
+    Returns:
+        SHA-256 hex digest identifying the request
+    """
+    payload = json.dumps(
+        {"provider": provider, "model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_generate(client, prompt: str, temperature: Optional[float] = None,
+                    use_history: bool = False):
+    """
+    Generate a response, reusing an earlier one for identical deterministic requests.
+    
+    Only requests made explicitly with temperature 0 are cached. Without a
+    temperature the provider default applies, which is usually sampled.
+    
+    Args:
+        client: LLMClient instance
+        prompt: Input prompt
+        temperature: Sampling temperature (provider default if None)
+        use_history: Whether to include interaction history in the prompt
+        
+    Returns:
+        LLMResponse object
+    """
+    if temperature is None:
+        return client.generate(prompt, use_history=use_history)
+    if temperature > 0:
+        return client.generate(prompt, use_history=use_history,
+                               temperature=temperature)
+    
+    messages = client.history.get_as_messages() if use_history else []
+    messages.append({"role": "user", "content": prompt})
+    # Include the client's defaults (system prompt, max_tokens, ...) exactly
+    # as generate() merges them, since they change the response too
+    params = {**client.get_default_params(), "temperature": temperature}
+    key = cache_key(client.facade.provider_name, client.facade.model_name,
+                    messages, params)
+    
+    response = _response_cache.get(key)
+    if response is None:
+        response = client.generate(prompt, use_history=use_history,
+                                   temperature=temperature)
+        if response.error is None:
+            _response_cache[key] = response
+    else:
+        # Keep the conversation history consistent with an uncached call
+        client.history.add_interaction(prompt, response)
+    
+    return response
+
+
 def main():
     """Demonstrate basic usage of the LLM system."""
     
@@ -27,20 +101,29 @@ def main():
     client = system.create_client()
     
     # Simple generation
-    response = client.generate("What is the capital of France?")
+    response = cached_generate(client, "What is the capital of France?",
+                               temperature=0.0)
     print(f"\nPrompt: What is the capital of France?")
     print(f"Response: {response.content}")
     print(f"Model: {response.model}")
     print(f"Provider: {response.provider}")
     
     # With history
-    response = client.generate("What is its population?", use_history=True)
+    response = cached_generate(client, "What is its population?",
+                               temperature=0.0, use_history=True)
     print(f"\nPrompt: What is its population?")
     print(f"Response: {response.content}")
     
     # Check history
     print(f"\nHistory Size: {client.history.size()}")
     
+    # Repeating a deterministic prompt is served from the cache
+    response = cached_generate(client, "What is the capital of France?",
+                               temperature=0.0)
+    print(f"\nPrompt (repeated): What is the capital of France?")
+    print(f"Response: {response.content}")
+    print(f"Cached responses: {len(_response_cache)}")
+    
     # Multi-shot example
     print("\n" + "="*50)
     print("Example 2: Multi-shot Learning")
@@ -94,13 +177,15 @@ def main():
     all_models = system.list_models()
     print(f"\nTotal models: {len(all_models)}")
     
-    for model_name in all_models[:10]:  # Show first 10
-        model_info = system.get_model_info(model_name)
-        print(f"\n{model_name}")
-        print(f"  Provider: {model_info.get('provider')}")
-        print(f"  Description: {model_info.get('description')}")
-        print(f"  Cost: ${model_info.get('cost_per_1m_input_tokens')}/1M input, "
-              f"${model_info.get('cost_per_1m_output_tokens')}/1M output")
+    models_info = system.get_models_info(all_models[:10])  # Show first 10
+    print("\n".join(
+        f"\n{model_name}\n"
+        f"  Provider: {model_info.get('provider')}\n"
+        f"  Description: {model_info.get('description')}\n"
+        f"  Cost: ${model_info.get('cost_per_1m_input_tokens')}/1M input, "
+        f"${model_info.get('cost_per_1m_output_tokens')}/1M output"
+        for model_name, model_info in models_info.items()
+    ))
 
 
 if __name__ == "__main__":
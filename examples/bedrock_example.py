@@ -4,7 +4,7 @@ AWS Bedrock Claude API Example
 This example shows how to use Claude through AWS Bedrock.
 
 Requirements:
-    pip install boto3
+    pip install boto3 orjson
 
 Setup:
     1. Configure AWS credentials (one of the following):
@@ -18,6 +18,7 @@ Setup:
        - Wait for approval (usually instant)
 
 Available Claude Models on Bedrock:
+    - anthropic.claude-3-7-sonnet-20250219-v1:0 (via the us. inference profile)
     - anthropic.claude-3-5-sonnet-20241022-v2:0
     - anthropic.claude-3-5-sonnet-20240620-v1:0
     - anthropic.claude-3-opus-20240229-v1:0
@@ -25,15 +26,54 @@ Available Claude Models on Bedrock:
     - anthropic.claude-3-haiku-20240307-v1:0
 """
 
-import json
+import asyncio
+import functools
 import boto3
+import orjson
+from botocore.config import Config
 from typing import Dict, Any
 
+from prompt_cache import with_cache_breakpoint
+from stream_writer import CoalescingStdout
+
+# Claude models that support prompt caching on Bedrock
+PROMPT_CACHING_MODEL_IDS = {
+    "anthropic.claude-3-5-haiku-20241022-v1:0",
+    "anthropic.claude-3-7-sonnet-20250219-v1:0",
+    "anthropic.claude-sonnet-4-20250514-v1:0",
+    "anthropic.claude-opus-4-20250514-v1:0",
+}
+
+# The multi-turn example uses a model with prompt caching
+MULTI_TURN_MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+
+# Timeouts in seconds. invoke_model only returns once the whole generation is
+# done, and botocore retries a read timeout, so the read timeout must cover
+# the longest response the examples request (MAX_TOKENS) or a slow but valid
+# request would be sent and billed again on every attempt.
+MAX_TOKENS = 1024
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT_BASE = 10.0
+READ_TIMEOUT_PER_TOKEN = 0.05
+
+@functools.lru_cache(maxsize=None)
 def create_bedrock_client(region: str = "us-east-1"):
-    """Create and return a Bedrock Runtime client"""
+    """
+    Create and return a Bedrock Runtime client
+    
+    The client is cached per region so every invocation reuses the same
+    connection pool instead of paying for a new TLS handshake.
+    """
     return boto3.client(
         service_name="bedrock-runtime",
-        region_name=region
+        region_name=region,
+        config=Config(
+            max_pool_connections=50,
+            retries={"mode": "adaptive", "total_max_attempts": 4},
+            connect_timeout=CONNECT_TIMEOUT,
+            read_timeout=READ_TIMEOUT_BASE + MAX_TOKENS * READ_TIMEOUT_PER_TOKEN,
+            tcp_keepalive=True
+        )
     )
 
 
@@ -41,7 +81,7 @@ def invoke_claude(
     client,
     prompt: str,
     model_id: str = "anthropic.claude-3-5-sonnet-20241022-v2:0",
-    max_tokens: int = 1024,
+    max_tokens: int = MAX_TOKENS,
     temperature: float = 1.0
 ) -> Dict[str, Any]:
     """
@@ -73,11 +113,11 @@ def invoke_claude(
     # Invoke the model
     response = client.invoke_model(
         modelId=model_id,
-        body=json.dumps(request_body)
+        body=orjson.dumps(request_body)
     )
     
     # Parse the response
-    response_body = json.loads(response['body'].read())
+    response_body = orjson.loads(response['body'].read())
     return response_body
 
 
@@ -85,7 +125,7 @@ def stream_claude(
     client,
     prompt: str,
     model_id: str = "anthropic.claude-3-5-sonnet-20241022-v2:0",
-    max_tokens: int = 1024
+    max_tokens: int = MAX_TOKENS
 ):
     """
     Stream Claude responses from AWS Bedrock
@@ -110,27 +150,39 @@ def stream_claude(
     # Invoke model with streaming
     response = client.invoke_model_with_response_stream(
         modelId=model_id,
-        body=json.dumps(request_body)
+        body=orjson.dumps(request_body)
     )
     
     # Process the stream
     stream = response.get('body')
     if stream:
+        writer = CoalescingStdout()
         for event in stream:
             chunk = event.get('chunk')
             if chunk:
-                chunk_data = json.loads(chunk.get('bytes').decode())
+                # orjson parses the raw bytes directly, no decode needed
+                chunk_data = orjson.loads(chunk['bytes'])
                 
                 # Handle different event types
                 if chunk_data['type'] == 'content_block_delta':
                     if 'delta' in chunk_data and 'text' in chunk_data['delta']:
-                        print(chunk_data['delta']['text'], end='', flush=True)
+                        writer.feed(chunk_data['delta']['text'])
                 elif chunk_data['type'] == 'message_stop':
-                    print()  # New line at the end
+                    writer.feed('\n')  # New line at the end
+        writer.close()
 
 
-def multi_turn_conversation_bedrock(client):
+def supports_prompt_caching(model_id: str) -> bool:
+    """Check whether a Bedrock model ID or inference profile supports prompt caching"""
+    # Cross-region inference profiles prefix the model ID, e.g. "us."
+    base_model_id = model_id.split(".", 1)[1] if model_id.count(".") > 1 else model_id
+    return base_model_id in PROMPT_CACHING_MODEL_IDS
+
+
+def multi_turn_conversation_bedrock(client, model_id: str = MULTI_TURN_MODEL_ID):
     """Example of multi-turn conversation on Bedrock"""
+    # Only mark the conversation for caching if the model accepts it
+    prepare = with_cache_breakpoint if supports_prompt_caching(model_id) else list
     messages = []
     
     # First turn
@@ -141,25 +193,22 @@ def multi_turn_conversation_bedrock(client):
     
     request_body = {
         "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 1024,
-        "messages": messages
+        "max_tokens": MAX_TOKENS,
+        "messages": prepare(messages)
     }
     
     response = client.invoke_model(
-        modelId="anthropic.claude-3-5-sonnet-20241022-v2:0",
-        body=json.dumps(request_body)
+        modelId=model_id,
+        body=orjson.dumps(request_body)
     )
     
-    response_body = json.loads(response['body'].read())
-    assistant_message = response_body['content'][0]['text']
-    
-    print("User: What are the three primary colors?")
-    print(f"Claude: {assistant_message}\n")
+    response_body = orjson.loads(response['body'].read())
+    first_answer = response_body['content'][0]['text']
     
     # Add assistant's response to conversation
     messages.append({
         "role": "assistant",
-        "content": [{"type": "text", "text": assistant_message}]
+        "content": [{"type": "text", "text": first_answer}]
     })
     
     # Second turn
@@ -168,57 +217,77 @@ def multi_turn_conversation_bedrock(client):
         "content": "What colors do you get when you mix them?"
     })
     
-    request_body["messages"] = messages
+    request_body["messages"] = prepare(messages)
     
     response = client.invoke_model(
-        modelId="anthropic.claude-3-5-sonnet-20241022-v2:0",
-        body=json.dumps(request_body)
+        modelId=model_id,
+        body=orjson.dumps(request_body)
     )
     
-    response_body = json.loads(response['body'].read())
+    response_body = orjson.loads(response['body'].read())
     assistant_message = response_body['content'][0]['text']
     
-    print("User: What colors do you get when you mix them?")
-    print(f"Claude: {assistant_message}")
+    # Print the whole transcript in one call so it does not interleave with
+    # examples running concurrently on other threads
+    print(
+        "\n=== Multi-turn Conversation ===\n"
+        "User: What are the three primary colors?\n"
+        f"Claude: {first_answer}\n\n"
+        "User: What colors do you get when you mix them?\n"
+        f"Claude: {assistant_message}"
+    )
 
 
-def main():
-    # Initialize Bedrock client
-    print("Initializing AWS Bedrock client...")
-    client = create_bedrock_client(region="us-east-1")
-    
-    # Basic invocation
-    print("\n=== Basic Example ===")
+def basic_example(client):
+    """Basic invocation with usage statistics"""
     response = invoke_claude(
         client,
         prompt="Explain machine learning in one paragraph.",
         max_tokens=512
     )
     
-    print("Claude's response:")
-    print(response['content'][0]['text'])
-    
-    print(f"\n--- Usage Statistics ---")
-    print(f"Input tokens: {response['usage']['input_tokens']}")
-    print(f"Output tokens: {response['usage']['output_tokens']}")
-    print(f"Model: {response.get('model', 'N/A')}")
+    # Print in one call so the output does not interleave with examples
+    # running concurrently on other threads
+    print(
+        "\n=== Basic Example ===\n"
+        "Claude's response:\n"
+        f"{response['content'][0]['text']}\n"
+        "\n--- Usage Statistics ---\n"
+        f"Input tokens: {response['usage']['input_tokens']}\n"
+        f"Output tokens: {response['usage']['output_tokens']}\n"
+        f"Model: {response.get('model', 'N/A')}"
+    )
+
+
+async def main():
+    # Initialize Bedrock client
+    print("Initializing AWS Bedrock client...")
+    client = create_bedrock_client(region="us-east-1")
+    loop = asyncio.get_running_loop()
     
-    # Streaming example
-    print("\n\n=== Streaming Example ===")
+    # Streaming example (runs on its own so tokens are not interleaved)
+    print("\n=== Streaming Example ===")
     print("Claude's streaming response:")
-    stream_claude(
-        client,
-        prompt="Write a haiku about cloud computing."
+    await loop.run_in_executor(
+        None,
+        functools.partial(
+            stream_claude,
+            client,
+            prompt="Write a haiku about cloud computing."
+        )
     )
     
-    # Multi-turn conversation
-    print("\n\n=== Multi-turn Conversation ===")
-    multi_turn_conversation_bedrock(client)
+    # The basic and multi-turn examples are independent, so run them
+    # concurrently. boto3 clients are thread-safe and can be shared.
+    await asyncio.gather(
+        loop.run_in_executor(None, basic_example, client),
+        loop.run_in_executor(None, multi_turn_conversation_bedrock, client)
+    )
 
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except Exception as e:
         print(f"Error: {e}")
         print("\nMake sure you have:")
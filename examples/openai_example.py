@@ -10,6 +10,9 @@ Setup:
     1. Get your API key from https://platform.openai.com/api-keys
     2. Set it as an environment variable: export OPENAI_API_KEY='your-key-here'
     Or pass it directly to the client (not recommended for production)
+    3. Optionally set OPENAI_USE_BATCH_API=1 to send the examples that do not
+       need an interactive response through the Batch API. It is billed at a
+       discount but can take up to 24 hours, and the script waits for it.
 
 Available Models:
     - gpt-4o (GPT-4 Optimized - Latest)
@@ -20,24 +23,342 @@ Available Models:
 """
 
 import os
-from openai import OpenAI
+import json
+import time
+import asyncio
+import httpx
+from typing import Optional
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError
+from openai.types.chat import ChatCompletion
+
+from stream_writer import CoalescingStdout
+
+# Timeouts in seconds. A non-streaming response only arrives once the whole
+# generation is done, so its read timeout grows with max_tokens; the base
+# value alone bounds the wait for the first streamed token.
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT_BASE = 10.0
+READ_TIMEOUT_PER_TOKEN = 0.05
+
+# Output length assumed for requests that do not set max_tokens
+DEFAULT_MAX_TOKENS = 4096
+
+# Number of attempts per request
+MAX_ATTEMPTS = 3
+
+# The Batch API completes requests within 24 hours, so only requests whose
+# latency budget covers that window are sent through it
+BATCH_COMPLETION_WINDOW_MS = 24 * 60 * 60 * 1000
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# SDK retries for the calls that create, poll and clean up a batch
+BATCH_API_RETRIES = 5
+
+# Latency budget for examples that do not need an interactive response
+LOOSE_LATENCY_BUDGET_MS = BATCH_COMPLETION_WINDOW_MS
+
+# Request payloads that never change are built once at import time. They are
+# tuples to signal that they must not be modified; pass a list copy to the SDK.
+_WEATHER_TOOLS = (
+    {
+        "type": "function",
+        "function": {
+            "name": "get_weather",
+            "description": "Get the current weather in a given location",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "description": "The city and state, e.g. San Francisco, CA"
+                    },
+                    "unit": {
+                        "type": "string",
+                        "enum": ["celsius", "fahrenheit"],
+                        "description": "The temperature unit"
+                    }
+                },
+                "required": ["location"]
+            }
+        }
+    },
+)
+
+_SHAKESPEARE_MESSAGES = (
+    {
+        "role": "system",
+        "content": "You are a helpful assistant that always responds in the style of Shakespeare. Use Elizabethan English."
+    },
+    {
+        "role": "user",
+        "content": "Tell me about machine learning."
+    }
+)
 
 
 def create_openai_client():
-    """Create and return an OpenAI client"""
-    return OpenAI(
-        api_key=os.environ.get("OPENAI_API_KEY")
+    """Create and return an async OpenAI client"""
+    # SDK retries are disabled since create_completion() does its own
+    return AsyncOpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        timeout=httpx.Timeout(READ_TIMEOUT_BASE, connect=CONNECT_TIMEOUT),
+        max_retries=0
     )
 
 
-def basic_example():
+def request_timeout(max_tokens: int) -> httpx.Timeout:
+    """Timeout for a non-streaming request generating up to max_tokens"""
+    return httpx.Timeout(
+        READ_TIMEOUT_BASE + max_tokens * READ_TIMEOUT_PER_TOKEN,
+        connect=CONNECT_TIMEOUT
+    )
+
+
+def is_retryable(error: APIConnectionError) -> bool:
+    """Retry failed connections, but not a request that timed out mid-generation"""
+    if isinstance(error, APITimeoutError):
+        return isinstance(error.__cause__, httpx.ConnectTimeout)
+    return True
+
+
+async def create_completion(client, **kwargs):
+    """Create a chat completion, retrying when the connection to the API fails"""
+    kwargs.setdefault(
+        "timeout", request_timeout(kwargs.get("max_tokens", DEFAULT_MAX_TOKENS))
+    )
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return await client.chat.completions.create(**kwargs)
+        except APIConnectionError as e:
+            # APITimeoutError is a subclass of APIConnectionError
+            if attempt == MAX_ATTEMPTS - 1 or not is_retryable(e):
+                raise
+
+
+class FleetDispatcher:
+    """
+    Route chat completions by latency budget.
+    
+    With use_batch_api off (the default), every request is sent straight away.
+    With it on, requests whose budget covers BATCH_COMPLETION_WINDOW_MS are
+    collected and submitted together through the OpenAI Batch API, which is
+    billed at a discount. Collection ends once no new request has arrived for
+    `batch_idle_ms`, or at the latest after `batch_window_ms`, so the batch
+    holds exactly the requests queued by then. A group smaller than
+    `batch_min_size` is sent as regular requests instead.
+    
+    A batch that is still running at the tightest deadline, whose polling
+    fails, or whose caller is cancelled is cancelled as well. Results it
+    already produced are kept and only the remaining requests are sent
+    directly, so nothing is paid for twice.
+    """
+    
+    def __init__(self, client, use_batch_api: bool = False,
+                 batch_idle_ms: int = 100, batch_window_ms: int = 30_000,
+                 batch_min_size: int = 1, poll_interval: float = 5.0):
+        """
+        Initialize the dispatcher.
+        
+        Args:
+            client: AsyncOpenAI client
+            use_batch_api: Whether loose-latency requests may be batched
+            batch_idle_ms: Quiet period after which collected requests are dispatched
+            batch_window_ms: Longest time to collect requests before dispatching
+            batch_min_size: Minimum number of requests worth a batch
+            poll_interval: Seconds between batch status checks
+        """
+        self.client = client
+        self.use_batch_api = use_batch_api
+        self.batch_idle_ms = batch_idle_ms
+        self.batch_window_ms = batch_window_ms
+        self.batch_min_size = batch_min_size
+        self.poll_interval = poll_interval
+        
+        # Batch management calls are not replayed by create_completion(), so
+        # they rely on the SDK's own retries with backoff
+        self._batch_api = client.with_options(max_retries=BATCH_API_RETRIES)
+        
+        self._pending = []
+        self._idle_timer = None
+        self._window_timer = None
+        self._tasks = set()
+    
+    async def dispatch(self, latency_budget_ms: int, **request):
+        """
+        Create a chat completion within the given latency budget.
+        
+        Args:
+            latency_budget_ms: How long the caller is willing to wait
+            **request: Arguments for chat.completions.create
+            
+        Returns:
+            ChatCompletion
+        """
+        if not self.use_batch_api or latency_budget_ms < BATCH_COMPLETION_WINDOW_MS:
+            return await create_completion(self.client, **request)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = time.monotonic() + latency_budget_ms / 1000
+        self._pending.append((request, deadline, future))
+        
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        self._idle_timer = loop.call_later(self.batch_idle_ms / 1000, self._flush)
+        if self._window_timer is None:
+            self._window_timer = loop.call_later(self.batch_window_ms / 1000, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """Dispatch everything collected so far."""
+        for timer in (self._idle_timer, self._window_timer):
+            if timer is not None:
+                timer.cancel()
+        self._idle_timer = self._window_timer = None
+        
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        
+        task = asyncio.ensure_future(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, pending):
+        """Send a group of requests as a batch or individually."""
+        results = {}
+        try:
+            if len(pending) >= self.batch_min_size:
+                deadline = min(item[1] for item in pending)
+                try:
+                    results = await self._run_batch(
+                        [request for request, _, _ in pending], deadline
+                    )
+                except Exception:
+                    results = {}
+            
+            # Anything the batch did not answer is sent as a regular request
+            await asyncio.gather(*(
+                self._resolve(future, results.get(index), request)
+                for index, (request, _, future) in enumerate(pending)
+            ))
+        except asyncio.CancelledError:
+            for _, _, future in pending:
+                future.cancel()
+            raise
+    
+    async def _resolve(self, future, result, request):
+        """Complete a waiting caller, sending the request directly if needed."""
+        try:
+            if result is None:
+                result = await create_completion(self.client, **request)
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+    
+    async def _run_batch(self, requests, deadline: float):
+        """
+        Submit requests through the Batch API and wait for the results.
+        
+        Args:
+            requests: Chat completion arguments, one per request
+            deadline: time.monotonic() value by which results are needed
+            
+        Returns:
+            Dictionary mapping request index to ChatCompletion
+        """
+        lines = [
+            json.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": request
+            })
+            for index, request in enumerate(requests)
+        ]
+        batch_file = await self._batch_api.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = None
+        try:
+            batch = await self._batch_api.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            try:
+                batch = await self._wait_for_batch(batch, deadline)
+            except asyncio.CancelledError:
+                # Nobody will read the results, so stop the batch before
+                # shutting down rather than leave it running and billed
+                await self._cancel_batch(batch)
+                raise
+            except Exception:
+                # Polling failed even after retries. Cancel the batch and
+                # collect whatever it already finished; the rest falls back
+                # to regular requests.
+                batch = await self._cancel_batch(batch)
+                batch = await self._wait_for_batch(batch, None)
+            return await self._read_results(batch)
+        finally:
+            # Remove the batch's files so they do not accumulate in the account
+            file_ids = [batch_file.id]
+            if batch is not None:
+                file_ids += [batch.output_file_id, batch.error_file_id]
+            for file_id in file_ids:
+                if file_id:
+                    try:
+                        await self._batch_api.files.delete(file_id)
+                    except Exception:
+                        pass
+    
+    async def _wait_for_batch(self, batch, deadline: Optional[float]):
+        """Poll a batch until it ends, cancelling it once the deadline is near."""
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            if (deadline is not None and batch.status != "cancelling"
+                    and time.monotonic() + self.poll_interval > deadline):
+                batch = await self._cancel_batch(batch)
+                continue
+            await asyncio.sleep(self.poll_interval)
+            batch = await self._batch_api.batches.retrieve(batch.id)
+        return batch
+    
+    async def _cancel_batch(self, batch):
+        """Cancel a batch that has not ended yet, returning its latest state."""
+        if batch.status in BATCH_TERMINAL_STATUSES or batch.status == "cancelling":
+            return batch
+        return await self._batch_api.batches.cancel(batch.id)
+    
+    async def _read_results(self, batch):
+        """Parse the successful responses from a finished batch."""
+        results = {}
+        if not batch.output_file_id:
+            return results
+        
+        output = await self._batch_api.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            # Skip lines that cannot be parsed; their requests are sent
+            # directly instead of discarding the whole batch
+            try:
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    # construct() is lenient like the SDK's own response parsing
+                    results[int(item["custom_id"])] = ChatCompletion.construct(**response["body"])
+            except Exception:
+                continue
+        return results
+
+
+async def basic_example(client):
     """Basic example of using OpenAI API"""
-    client = create_openai_client()
-    
-    print("Sending request to OpenAI...")
-    
     # Create a chat completion
-    response = client.chat.completions.create(
+    response = await create_completion(
+        client,
         model="gpt-4o",
         max_tokens=1024,
         messages=[
@@ -49,7 +370,8 @@ def basic_example():
     )
     
     # Print the response
-    print("\nGPT's response:")
+    print("\n\n=== Basic Example ===")
+    print("GPT's response:")
     print(response.choices[0].message.content)
     
     # Print usage information
@@ -60,13 +382,13 @@ def basic_example():
     print(f"Model: {response.model}")
 
 
-def streaming_example():
+async def streaming_example(client):
     """Example of streaming responses for real-time output"""
-    client = create_openai_client()
-    
     print("Streaming response from OpenAI...\n")
     
-    stream = client.chat.completions.create(
+    # A stream cannot be replayed by create_completion(), so let the SDK
+    # retry establishing it instead
+    stream = await client.with_options(max_retries=MAX_ATTEMPTS - 1).chat.completions.create(
         model="gpt-4o",
         max_tokens=1024,
         stream=True,
@@ -78,17 +400,16 @@ def streaming_example():
         ]
     )
     
-    for chunk in stream:
+    writer = CoalescingStdout()
+    async for chunk in stream:
         if chunk.choices[0].delta.content is not None:
-            print(chunk.choices[0].delta.content, end="", flush=True)
-    
-    print("\n")
+            writer.feed(chunk.choices[0].delta.content)
+    writer.feed("\n\n")
+    writer.close()
 
 
-def multi_turn_conversation():
+async def multi_turn_conversation(client):
     """Example of a multi-turn conversation"""
-    client = create_openai_client()
-    
     messages = [
         {
             "role": "user",
@@ -97,7 +418,8 @@ def multi_turn_conversation():
     ]
     
     # First turn
-    response = client.chat.completions.create(
+    response = await create_completion(
+        client,
         model="gpt-4o",
         max_tokens=1024,
         messages=messages
@@ -105,9 +427,6 @@ def multi_turn_conversation():
     
     assistant_message = response.choices[0].message.content
     
-    print("User: What is the capital of France?")
-    print(f"GPT: {assistant_message}\n")
-    
     # Add assistant's response to conversation
     messages.append({
         "role": "assistant",
@@ -120,107 +439,79 @@ def multi_turn_conversation():
         "content": "What is its population?"
     })
     
-    response = client.chat.completions.create(
+    response = await create_completion(
+        client,
         model="gpt-4o",
         max_tokens=1024,
         messages=messages
     )
     
+    # Print the whole transcript at once so it does not interleave with
+    # examples running concurrently
+    print("\n\n=== Multi-turn Conversation ===")
+    print("User: What is the capital of France?")
+    print(f"GPT: {assistant_message}\n")
     print("User: What is its population?")
     print(f"GPT: {response.choices[0].message.content}")
 
 
-def system_prompt_example():
+async def system_prompt_example(client):
     """Example using system prompts"""
-    client = create_openai_client()
-    
-    print("Using system prompt to set GPT's behavior...\n")
-    
-    response = client.chat.completions.create(
+    response = await create_completion(
+        client,
         model="gpt-4o",
         max_tokens=512,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant that always responds in the style of Shakespeare. Use Elizabethan English."
-            },
-            {
-                "role": "user",
-                "content": "Tell me about machine learning."
-            }
-        ]
+        messages=list(_SHAKESPEARE_MESSAGES)
     )
     
+    print("\n\n=== System Prompt Example ===")
+    print("Using system prompt to set GPT's behavior...\n")
     print("User: Tell me about machine learning.")
     print(f"GPT (as Shakespeare): {response.choices[0].message.content}")
 
 
-def with_temperature_example():
+async def with_temperature_example(dispatcher):
     """Example showing different temperature settings"""
-    client = create_openai_client()
+    # Both requests are independent, so issue them concurrently
+    low, high = await asyncio.gather(
+        dispatcher.dispatch(
+            LOOSE_LATENCY_BUDGET_MS,
+            model="gpt-4o",
+            max_tokens=200,
+            temperature=0.2,
+            messages=[
+                {
+                    "role": "user",
+                    "content": "Give me a creative name for a tech startup."
+                }
+            ]
+        ),
+        dispatcher.dispatch(
+            LOOSE_LATENCY_BUDGET_MS,
+            model="gpt-4o",
+            max_tokens=200,
+            temperature=1.5,
+            messages=[
+                {
+                    "role": "user",
+                    "content": "Give me a creative name for a tech startup."
+                }
+            ]
+        )
+    )
     
+    print("\n\n=== Temperature Examples ===")
     print("=== Low Temperature (0.2) - More Focused ===")
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        max_tokens=200,
-        temperature=0.2,
-        messages=[
-            {
-                "role": "user",
-                "content": "Give me a creative name for a tech startup."
-            }
-        ]
-    )
-    print(response.choices[0].message.content)
+    print(low.choices[0].message.content)
     
     print("\n=== High Temperature (1.5) - More Creative ===")
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        max_tokens=200,
-        temperature=1.5,
-        messages=[
-            {
-                "role": "user",
-                "content": "Give me a creative name for a tech startup."
-            }
-        ]
-    )
-    print(response.choices[0].message.content)
+    print(high.choices[0].message.content)
 
 
-def function_calling_example():
+async def function_calling_example(client):
     """Example of function calling (tool use)"""
-    client = create_openai_client()
-    
-    # Define a function
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "get_weather",
-                "description": "Get the current weather in a given location",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "location": {
-                            "type": "string",
-                            "description": "The city and state, e.g. San Francisco, CA"
-                        },
-                        "unit": {
-                            "type": "string",
-                            "enum": ["celsius", "fahrenheit"],
-                            "description": "The temperature unit"
-                        }
-                    },
-                    "required": ["location"]
-                }
-            }
-        }
-    ]
-    
-    print("Demonstrating function calling...\n")
-    
-    response = client.chat.completions.create(
+    response = await create_completion(
+        client,
         model="gpt-4o",
         messages=[
             {
@@ -228,10 +519,13 @@ def function_calling_example():
                 "content": "What's the weather like in Boston?"
             }
         ],
-        tools=tools,
+        tools=list(_WEATHER_TOOLS),
         tool_choice="auto"
     )
     
+    print("\n\n=== Function Calling Example ===")
+    print("Demonstrating function calling...\n")
+    
     # Check if the model wants to call a function
     if response.choices[0].message.tool_calls:
         tool_call = response.choices[0].message.tool_calls[0]
@@ -241,13 +535,10 @@ def function_calling_example():
         print(f"GPT response: {response.choices[0].message.content}")
 
 
-def vision_example():
+async def vision_example(dispatcher):
     """Example of vision capabilities (image understanding)"""
-    client = create_openai_client()
-    
-    print("Demonstrating vision capabilities...\n")
-    
-    response = client.chat.completions.create(
+    response = await dispatcher.dispatch(
+        LOOSE_LATENCY_BUDGET_MS,
         model="gpt-4o",
         max_tokens=1024,
         messages=[
@@ -269,16 +560,15 @@ def vision_example():
         ]
     )
     
+    print("\n\n=== Vision Example ===")
+    print("Demonstrating vision capabilities...\n")
     print(f"GPT's description: {response.choices[0].message.content}")
 
 
-def json_mode_example():
+async def json_mode_example(dispatcher):
     """Example of JSON mode for structured outputs"""
-    client = create_openai_client()
-    
-    print("Requesting JSON-formatted response...\n")
-    
-    response = client.chat.completions.create(
+    response = await dispatcher.dispatch(
+        LOOSE_LATENCY_BUDGET_MS,
         model="gpt-4o",
         response_format={"type": "json_object"},
         messages=[
@@ -293,39 +583,45 @@ def json_mode_example():
         ]
     )
     
+    print("\n\n=== JSON Mode Example ===")
+    print("Requesting JSON-formatted response...\n")
     print(response.choices[0].message.content)
 
 
-def main():
+async def main():
     """Run all examples"""
-    print("=== Basic Example ===")
-    basic_example()
-    
-    print("\n\n=== Streaming Example ===")
-    streaming_example()
-    
-    print("\n\n=== Multi-turn Conversation ===")
-    multi_turn_conversation()
-    
-    print("\n\n=== System Prompt Example ===")
-    system_prompt_example()
-    
-    print("\n\n=== Temperature Examples ===")
-    with_temperature_example()
-    
-    print("\n\n=== Function Calling Example ===")
-    function_calling_example()
-    
-    print("\n\n=== Vision Example ===")
-    vision_example()
-    
-    print("\n\n=== JSON Mode Example ===")
-    json_mode_example()
+    # One client is shared so its connection pool is reused by every request,
+    # and closed when the examples are done
+    async with create_openai_client() as client:
+        # Examples that do not need an interactive response go through the
+        # dispatcher. They are sent directly unless OPENAI_USE_BATCH_API is set,
+        # in which case they run through the cheaper Batch API.
+        use_batch_api = os.environ.get("OPENAI_USE_BATCH_API", "").lower() in ("1", "true", "yes")
+        dispatcher = FleetDispatcher(client, use_batch_api=use_batch_api)
+        if use_batch_api:
+            print("The temperature, vision and JSON mode examples run through the Batch API")
+            print("and are printed once the batch completes (usually minutes, at most 24h).\n")
+        
+        # Streaming writes tokens as they arrive, so it runs on its own
+        print("=== Streaming Example ===")
+        await streaming_example(client)
+        
+        # The remaining examples do not depend on each other, so their requests
+        # are issued concurrently. Each prints its output once it completes.
+        await asyncio.gather(
+            basic_example(client),
+            multi_turn_conversation(client),
+            system_prompt_example(client),
+            with_temperature_example(dispatcher),
+            function_calling_example(client),
+            vision_example(dispatcher),
+            json_mode_example(dispatcher)
+        )
 
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except Exception as e:
         print(f"Error: {e}")
         print("\nMake sure you have:")
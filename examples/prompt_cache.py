@@ -0,0 +1,29 @@
+"""
+Prompt Cache Breakpoints
+========================
+Helper used by the Claude examples to mark a conversation for prompt caching.
+
+With a cache_control breakpoint on the last message, the API caches the
+whole conversation up to that point. On the next turn the earlier messages
+are read from the cache and only the newly added tokens are processed.
+"""
+
+
+def with_cache_breakpoint(messages):
+    """
+    Return a copy of the conversation with a cache breakpoint on the last message.
+
+    The messages passed in are not modified.
+
+    Args:
+        messages: Chat messages in the Anthropic messages format
+
+    Returns:
+        List of messages ready to send
+    """
+    *history, last = messages
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    content = content[:-1] + [{**content[-1], "cache_control": {"type": "ephemeral"}}]
+    return history + [{**last, "content": content}]
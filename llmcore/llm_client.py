@@ -256,6 +256,15 @@ class LLMClient:
         """
         self._default_params.update(kwargs)
     
+    def get_default_params(self) -> Dict[str, Any]:
+        """
+        Get the default parameters applied to all generations.
+        
+        Returns:
+            Copy of the default parameters dictionary
+        """
+        return dict(self._default_params)
+    
     def get_history(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get interaction history.
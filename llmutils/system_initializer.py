@@ -8,7 +8,7 @@ email: ajsinha@gmail.com
 
 import os
 import logging
-from typing import Optional
+from typing import Dict, List, Optional
 
 from ..llmcore import LLMProviderFactory, LLMClientFactory
 from ..llmproviders import (
@@ -183,6 +183,22 @@ class LLMSystem:
         
         return self.config_loader.get_model_config(model_name) or {}
     
+    def get_models_info(self, model_names: List[str]) -> Dict[str, dict]:
+        """
+        Get information about several models in one call.
+        
+        Args:
+            model_names: Names of the models
+            
+        Returns:
+            Dictionary mapping each model name to its information dictionary
+        """
+        if not self._initialized:
+            raise RuntimeError("System not initialized")
+        
+        models = self.config_loader.get_all_models()
+        return {name: models.get(name) or {} for name in model_names}
+    
     def get_provider_info(self, provider_name: str) -> dict:
         """
         Get information about a provider.